@@ -1,137 +1,347 @@
 import os
+import re
+import ssl
 import shutil
+import subprocess
 import argparse
+import hashlib
 import logging
+import tarfile
+import tempfile
+import urllib.request
+from functools import lru_cache
 from datetime import datetime
 from dulwich import porcelain
-import tempfile
 import time
+from concurrent.futures import ThreadPoolExecutor
 import customtkinter as ctk
 import tkinter as tk
 from tkinter import ttk
 import tiktoken
 from tkinter import filedialog
 
-logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
-
-def is_binary(file_path):
-    try:
-        with open(file_path, 'tr') as check_file:
-            check_file.read()
-            return False
-    except:
+try:
+    import jupytext
+except ImportError:
+    jupytext = None
+
+# Shared accent colors for buttons and highlights, defined once instead of
+# being repeated at every widget construction
+ACCENT_COLOR = "#8E44AD"
+ACCENT_HOVER = "#9B59B6"
+
+# Dialog fonts, built once at import time rather than per dialog
+MESSAGE_FONT = ("Arial", 12)
+MESSAGE_BUTTON_FONT = ("Arial", 11)
+ERROR_FONT = ("Arial", 14)
+ERROR_BUTTON_FONT = ("Arial", 12)
+
+@lru_cache(maxsize=4)
+def get_encoding(model="gpt-4"):
+    """Load the tiktoken encoding once and reuse it across calls."""
+    return tiktoken.encoding_for_model(model)
+
+# Bytes that appear in text files: common control chars plus everything
+# printable (high bytes included, so any UTF-8 continuation passes)
+_TEXT_CHARS = bytes({7, 8, 9, 10, 12, 13, 27} | set(range(0x20, 0x100)) - {0x7f})
+
+def looks_binary(data):
+    # Sniff the first 8 KB: a NUL byte means binary (git's own heuristic),
+    # otherwise count non-text bytes with a C-speed translate pass
+    chunk = data[:8192]
+    if not chunk:
+        return False
+    if b'\x00' in chunk:
         return True
+    nontext = len(chunk.translate(None, _TEXT_CHARS))
+    return nontext / len(chunk) > 0.10
 
-def is_git_related(path):
-    git_patterns = ['.git', '.gitignore', '.gitattributes']
-    return any(pattern in path for pattern in git_patterns)
+_LICENSE_NAMES = frozenset({'license', 'license.txt', 'license.md'})
+_README_NAMES = frozenset({'readme', 'readme.txt', 'readme.md'})
+
+_GIT_NAMES = frozenset({'.git', '.gitignore', '.gitattributes'})
+
+def is_git_related(name):
+    return name in _GIT_NAMES
 
 def should_exclude(file, ignore_git, exclude_license, exclude_readme):
     if ignore_git and is_git_related(file):
         return True
-    if exclude_license and file.lower() in ['license', 'license.txt', 'license.md']:
+    lower = file.lower()
+    if exclude_license and lower in _LICENSE_NAMES:
         return True
-    if exclude_readme and file.lower() in ['readme', 'readme.txt', 'readme.md']:
+    if exclude_readme and lower in _README_NAMES:
         return True
     return False
 
-def get_structure(path, only_dirs=False, exclude=None, include=None, ignore_git=True, exclude_license=True, exclude_readme=False):
-    structure = []
-    for root, dirs, files in os.walk(path):
-        if ignore_git and is_git_related(root):
-            continue
-        
-        level = root.replace(path, '').count(os.sep)
-        indent = '│   ' * (level - 1) + '├── '
-        subindent = '│   ' * level + '├── '
-        
-        if only_dirs:
-            structure.append(f'{indent}{os.path.basename(root)}/')
-        else:
-            structure.append(f'{indent}{os.path.basename(root)}/')
-            for f in files:
-                if should_exclude(f, ignore_git, exclude_license, exclude_readme):
-                    continue
-                if exclude and any(f.endswith(ext) for ext in exclude):
-                    continue
-                if include and not any(f.endswith(ext) for ext in include):
-                    continue
-                structure.append(f'{subindent}{f}')
-    return '\n'.join(structure)
+def normalize_extensions(extensions):
+    """Turn user-supplied extension filters into a frozenset of lowercase
+    extensions without the leading dot, for O(1) per-file lookups."""
+    if not extensions:
+        return None
+    return frozenset(ext.lstrip('.').lower() for ext in extensions)
+
+def scan_tree(path, depth=0):
+    """os.walk-style top-down traversal built on os.scandir.
+
+    Yields (root, dirs, files, depth) tuples; like os.walk, the dirs list
+    can be pruned in place to stop descent. Entry type comes from the
+    DirEntry returned by scandir, avoiding an extra stat call per entry,
+    and depth is tracked by the recursion itself.
+    """
+    dirs = []
+    files = []
+    try:
+        with os.scandir(path) as entries:
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    dirs.append(entry.name)
+                else:
+                    files.append(entry.name)
+    except OSError as e:
+        logging.warning("Cannot scan %s: %s", path, e)
+        return
+    # Sort once per directory so consumers see a deterministic order
+    dirs.sort()
+    files.sort()
+    yield path, dirs, files, depth
+    for d in dirs:
+        yield from scan_tree(os.path.join(path, d), depth + 1)
+
+@lru_cache(maxsize=None)
+def _indent(level):
+    return '│   ' * max(level, 0) + '├── '
+
+@lru_cache(maxsize=256)
+def _convert_notebook_cached(file_path, mtime_ns, size):
+    # mtime_ns and size key the cache: a re-analysis of an unchanged
+    # notebook (e.g. from the clone cache) skips the JSON parse entirely
+    notebook = jupytext.read(file_path)
+    return jupytext.writes(notebook, fmt='md')
 
 def convert_notebook_to_markdown(file_path):
     """Convert Jupyter notebook to markdown using jupytext."""
+    if jupytext is None:
+        logging.error("jupytext is not installed, skipping notebook %s", file_path)
+        return None
     try:
-        import jupytext
-        notebook = jupytext.read(file_path)
-        return jupytext.writes(notebook, fmt='md')
+        stat = os.stat(file_path)
+        return _convert_notebook_cached(file_path, stat.st_mtime_ns, stat.st_size)
     except Exception as e:
-        logging.error(f"Error converting notebook {file_path}: {str(e)}")
+        logging.error("Error converting notebook %s: %s", file_path, e)
         return None
 
-def concatenate_files(path, exclude=None, include=None, ignore_git=True, exclude_license=True, exclude_readme=False):
-    content = []
+# Extensions whose text/binary nature is known up front, so the content
+# sniff in is_binary can be skipped entirely
+_TEXT_EXTS = frozenset({
+    '.py', '.md', '.txt', '.rst', '.json', '.js', '.ts', '.html', '.htm', '.css',
+    '.yml', '.yaml', '.toml', '.ini', '.cfg', '.sh', '.bat', '.ps1', '.c', '.h',
+    '.cpp', '.hpp', '.java', '.cs', '.rs', '.go', '.rb', '.php', '.xml', '.csv',
+})
+_BIN_EXTS = frozenset({
+    '.png', '.jpg', '.jpeg', '.gif', '.ico', '.icns', '.webp', '.bmp',
+    '.mp3', '.mp4', '.wav', '.ogg', '.avi', '.mov',
+    '.pdf', '.zip', '.tar', '.gz', '.bz2', '.xz', '.7z', '.rar',
+    '.whl', '.so', '.dll', '.dylib', '.exe', '.bin', '.o', '.a',
+    '.class', '.jar', '.pyc', '.pyo', '.parquet', '.db', '.sqlite',
+    '.ttf', '.otf', '.woff', '.woff2', '.pack', '.idx',
+})
+
+def read_file_content(file_path):
+    """Read a single file for concatenation; returns its text or None to skip."""
+    if file_path.endswith('.ipynb'):
+        return convert_notebook_to_markdown(file_path)
+    ext = os.path.splitext(file_path)[1].lower()
+    if ext in _BIN_EXTS:
+        return None
+    # Read the raw bytes once and classify from the buffer we already
+    # have, instead of opening the file a second time just to sniff it
+    try:
+        with open(file_path, 'rb') as f:
+            data = f.read()
+    except OSError as e:
+        logging.error("Error reading file %s: %s", file_path, e)
+        return None
+    if ext not in _TEXT_EXTS and looks_binary(data):
+        return None
+    return data.decode('utf-8', errors='replace')
+
+def walk_repo(path, only_dirs=False, exclude=None, include=None, ignore_git=True,
+              exclude_license=True, exclude_readme=False, concatenate=False):
+    """Traverse the repository once, producing the folder structure and,
+    if requested, the concatenated contents with their positions."""
+    structure = []
     file_positions = {}
-    current_position = 0
-    
-    for root, dirs, files in sorted(os.walk(path)):
-        if ignore_git and is_git_related(root):
-            continue
-        
+    items = []
+
+    exclude = normalize_extensions(exclude)
+    include = normalize_extensions(include)
+
+    for root, dirs, files, level in scan_tree(path):
+        if ignore_git:
+            # Prune before descent so the walk never enumerates .git/objects
+            dirs[:] = [d for d in dirs if not is_git_related(d)]
+
+        indent = _indent(level - 1)
+        subindent = _indent(level)
+        structure.append(f'{indent}{os.path.basename(root)}/')
+
         rel_path = os.path.relpath(root, path)
         if rel_path != '.':
             header = f"\n---{rel_path}/---\n"
         else:
             header = f"\n---/---\n"
-        content.append(header)
-        current_position += len(header)
-        
-        for file in sorted(files):
+        items.append(('header', header, None))
+
+        for file in files:
             if should_exclude(file, ignore_git, exclude_license, exclude_readme):
                 continue
-            file_path = os.path.join(root, file)
-            
-            # Handle different file types
-            if file.endswith('.ipynb'):
-                md_content = convert_notebook_to_markdown(file_path)
-                if md_content is None:
-                    continue
-                file_content = md_content
+            ext = os.path.splitext(file)[1][1:].lower()
+            excluded = exclude is not None and ext in exclude
+            included = include is None or ext in include
+            if not only_dirs and not excluded and included:
+                structure.append(f'{subindent}{file}')
+            # Notebooks are always concatenated regardless of type filters
+            if concatenate and (file.endswith('.ipynb') or (not excluded and included)):
+                rel_file = os.path.join(rel_path, file).replace(os.sep, '/')
+                items.append(('file', rel_file, os.path.join(root, file)))
+
+    structure_str = '\n'.join(structure)
+    if not concatenate:
+        return structure_str, None, file_positions
+
+    def generate_chunks():
+        # Read files concurrently (I/O bound), then yield chunks in walk
+        # order so the caller can stream them to disk instead of holding
+        # the whole concatenation in memory.
+        file_paths = [file_path for kind, _, file_path in items if kind == 'file']
+        with ThreadPoolExecutor(max_workers=min(32, (os.cpu_count() or 1) * 4)) as executor:
+            results = iter(list(executor.map(read_file_content, file_paths)))
+
+        current_position = 0
+        first = True
+        for kind, label, _ in items:
+            if kind == 'header':
+                piece = label if first else '\n' + label
+                first = False
+                yield piece
+                current_position += len(piece)
+                continue
+            file_content = next(results)
+            if file_content is None:
+                continue
+            header_piece = '\n' + f"\n--{os.path.basename(label)}--\n"
+            # Record the exact offset of the header within the stream
+            file_positions[label] = current_position + 1
+            current_position += len(header_piece) + len(file_content) + 1
+            yield header_piece
+            yield '\n' + file_content
+
+    return structure_str, generate_chunks(), file_positions
+
+def build_file_index(content, file_positions):
+    """Map each concatenated file to (line, start, end) within the final
+    document, so selection handlers can jump straight to a section instead
+    of rescanning the whole text for its header."""
+    index = {}
+    newlines = 0
+    prev = 0
+    ordered = sorted(file_positions.items(), key=lambda kv: kv[1])
+    for path, start in ordered:
+        newlines += content.count('\n', prev, start)
+        prev = start
+        # content[start] is the newline preceding the "--file--" header
+        header_line = newlines + 2
+        header_end = start + len(f"\n--{os.path.basename(path)}--\n")
+        next_marker = content.find('\n--', header_end)
+        end = next_marker if next_marker != -1 else len(content)
+        index[path] = (header_line, start + 1, end)
+    return index
+
+_GITHUB_URL = re.compile(r'^https://github\.com/([^/]+)/([^/]+?)(?:\.git)?/?$')
+
+def fetch_github_tarball(repo_url):
+    """Stream the HEAD tarball of a public GitHub repository into a temp
+    directory - no pack negotiation, just a gzip stream. Returns
+    (temp_dir, repo_dir); the caller owns cleaning up temp_dir."""
+    owner, repo = _GITHUB_URL.match(repo_url).groups()
+    tarball_url = f"https://codeload.github.com/{owner}/{repo}/tar.gz/HEAD"
+    logging.info("Downloading tarball: %s", tarball_url)
+    temp_dir = tempfile.mkdtemp()
+    try:
+        context = ssl.create_default_context()
+        with urllib.request.urlopen(tarball_url, context=context) as response:
+            with tarfile.open(fileobj=response, mode='r|gz') as archive:
+                if hasattr(tarfile, 'data_filter'):
+                    archive.extractall(temp_dir, filter='data')
+                else:
+                    archive.extractall(temp_dir)
+    except Exception:
+        safe_remove(temp_dir)
+        raise
+    # The tarball wraps everything in a single "{repo}-{ref}" directory
+    entries = [entry.path for entry in os.scandir(temp_dir) if entry.is_dir()]
+    repo_dir = entries[0] if len(entries) == 1 else temp_dir
+    return temp_dir, repo_dir
+
+def fetch_repo(repo_url, cache_root):
+    """Clone repo_url into a per-URL cache directory, or update the cached
+    clone from a previous run, and return the directory to analyze."""
+    cache_dir = os.path.join(cache_root, hashlib.sha1(repo_url.encode('utf-8')).hexdigest())
+    if os.path.isdir(cache_dir):
+        try:
+            logging.info("Updating cached clone of %s", repo_url)
+            if shutil.which('git'):
+                subprocess.run(
+                    ['git', '-C', cache_dir, 'pull', '--ff-only'],
+                    check=True, capture_output=True,
+                    env={**os.environ, 'GIT_TERMINAL_PROMPT': '0'}
+                )
             else:
-                if is_binary(file_path):
-                    continue
-                if exclude and any(file.endswith(ext) for ext in exclude):
-                    continue
-                if include and not any(file.endswith(ext) for ext in include):
-                    continue
-                
-                try:
-                    with open(file_path, 'r', encoding='utf-8') as f:
-                        file_content = f.read()
-                except Exception as e:
-                    logging.error(f"Error reading file {file_path}: {str(e)}")
-                    continue
-            
-            file_header = f"\n--{file}--\n"
-            content.append(file_header)
-            file_positions[os.path.join(rel_path, file)] = current_position
-            current_position += len(file_header)
-            content.append(file_content)
-            current_position += len(file_content)
-    
-    return '\n'.join(content), file_positions
+                porcelain.pull(cache_dir, repo_url)
+            return cache_dir
+        except Exception as e:
+            logging.warning("Failed to update cached clone (%s), recloning", e)
+            safe_remove(cache_dir)
+    logging.info("Cloning repository: %s", repo_url)
+    # Native git does the shallow fetch with pack negotiation in C, which
+    # is several times faster than dulwich's pure-Python fetch
+    if shutil.which('git'):
+        try:
+            subprocess.run(
+                ['git', 'clone', '--depth=1', '--single-branch', repo_url, cache_dir],
+                check=True, capture_output=True,
+                env={**os.environ, 'GIT_TERMINAL_PROMPT': '0'}
+            )
+            return cache_dir
+        except subprocess.CalledProcessError as e:
+            logging.warning("git clone failed (%s), falling back to dulwich", e.stderr.decode(errors='replace').strip())
+            safe_remove(cache_dir)
+    try:
+        # Only the current tree is analyzed, so skip the history entirely
+        porcelain.clone(repo_url, cache_dir, depth=1)
+    except Exception as e:
+        # Some servers reject shallow fetches; fall back to a full clone
+        logging.warning("Shallow clone failed (%s), retrying with full history", e)
+        safe_remove(cache_dir)
+        porcelain.clone(repo_url, cache_dir)
+    return cache_dir
 
 def safe_remove(path):
-    def onerror(func, path, exc_info):
-        logging.warning(f"Failed to remove {path}. Skipping.")
-    
     if os.path.isdir(path):
-        shutil.rmtree(path, onerror=onerror)
+        # Retry briefly instead of sleeping up front: Windows can keep
+        # handles on just-written files open for a moment
+        for _ in range(5):
+            shutil.rmtree(path, ignore_errors=True)
+            if not os.path.exists(path):
+                return
+            time.sleep(0.1)
+        logging.warning("Failed to remove %s. Skipping.", path)
     elif os.path.exists(path):
         try:
             os.remove(path)
         except Exception as e:
-            logging.warning(f"Failed to remove file {path}: {str(e)}")
+            logging.warning("Failed to remove file %s: %s", path, e)
 
 class App(ctk.CTk):
     def __init__(self):
@@ -166,6 +376,27 @@ class App(ctk.CTk):
         self.right_frame = ctk.CTkFrame(self.main_frame)
         self.right_frame.pack(side="right", fill="both", expand=True)
 
+        # Pending after() job for the debounced count update, plus a
+        # generation counter so stale background recounts are discarded
+        self._count_job = None
+        self._count_generation = 0
+
+        # Per-section token counts keyed by content hash, so editing one
+        # file section doesn't retokenize the rest of the buffer
+        self._token_cache = {}
+
+        # Worker pool so clone/walk/read work never blocks the Tk event loop
+        self._executor = ThreadPoolExecutor(max_workers=2)
+
+        # Per-file (line, start, end) index into the displayed document
+        self._file_index = {}
+
+        # Line currently carrying the highlight tag, if any
+        self._highlighted_line = None
+
+        # Reusable message window, created lazily by show_message
+        self._message_window = None
+
         self.setup_left_frame()
         self.setup_right_frame()
 
@@ -175,7 +406,7 @@ class App(ctk.CTk):
 
     def setup_left_frame(self):
         # Load Session button
-        self.load_session_button = ctk.CTkButton(self.left_frame, text="Load Session", command=self.load_session, fg_color="#8E44AD", hover_color="#9B59B6")
+        self.load_session_button = ctk.CTkButton(self.left_frame, text="Load Session", command=self.load_session, fg_color=ACCENT_COLOR, hover_color=ACCENT_HOVER)
         self.load_session_button.pack(pady=(0, 20), padx=10)
         # Repository address
         self.repo_label = ctk.CTkLabel(self.left_frame, text="Repository address:")
@@ -220,7 +451,7 @@ class App(ctk.CTk):
         self.exclude_license_switch.pack(pady=(0, 20), padx=10, anchor="w")
 
         # Analyze button
-        self.analyze_button = ctk.CTkButton(self.left_frame, text="Analyze Repository", command=self.analyze_repo, fg_color="#8E44AD", hover_color="#9B59B6")
+        self.analyze_button = ctk.CTkButton(self.left_frame, text="Analyze Repository", command=self.analyze_repo, fg_color=ACCENT_COLOR, hover_color=ACCENT_HOVER)
         self.analyze_button.pack(pady=(0, 20), padx=10)
 
     def setup_right_frame(self):
@@ -234,7 +465,7 @@ class App(ctk.CTk):
         self.sidebar_frame.pack_propagate(False)  # Prevent frame from shrinking
 
         # Create the "Copy Selected" button and place it at the top of the sidebar frame
-        self.copy_selected_button = ctk.CTkButton(self.sidebar_frame, text="Copy Selected", command=self.copy_selected_files, fg_color="#8E44AD", hover_color="#9B59B6")
+        self.copy_selected_button = ctk.CTkButton(self.sidebar_frame, text="Copy Selected", command=self.copy_selected_files, fg_color=ACCENT_COLOR, hover_color=ACCENT_HOVER)
         self.copy_selected_button.pack(side="top", pady=(0, 10), padx=10, fill="x")
 
         # Create the sidebar
@@ -270,11 +501,11 @@ class App(ctk.CTk):
         self.button_frame.pack(fill="x", padx=10, pady=(5, 5))
 
         # Create the copy button
-        self.copy_button = ctk.CTkButton(self.button_frame, text="Copy", command=self.copy_text, fg_color="#8E44AD", hover_color="#9B59B6")
+        self.copy_button = ctk.CTkButton(self.button_frame, text="Copy", command=self.copy_text, fg_color=ACCENT_COLOR, hover_color=ACCENT_HOVER)
         self.copy_button.pack(side="left", padx=(0, 5))
 
         # Create the save button
-        self.save_button = ctk.CTkButton(self.button_frame, text="Save", command=self.save_changes, fg_color="#8E44AD", hover_color="#9B59B6")
+        self.save_button = ctk.CTkButton(self.button_frame, text="Save", command=self.save_changes, fg_color=ACCENT_COLOR, hover_color=ACCENT_HOVER)
         self.save_button.pack(side="left")
 
         # Create the text display
@@ -285,46 +516,64 @@ class App(ctk.CTk):
         self.text_display.bind("<KeyRelease>", self.update_counts)
         self.text_display.bind("<ButtonRelease-1>", self.update_counts)
 
+        # Configure the highlight tag once; _highlight_line only moves it
+        self.text_display.tag_config("highlight", background=ACCENT_COLOR, foreground="white")
+
     def save_changes(self):
         try:
             content = self.text_display.get("1.0", "end-1c")
-            with open(self.current_output_file, 'w', encoding='utf-8') as f:
-                f.write(content)
+            # Write the whole file in one encoded block to a temp file and
+            # rename it into place, so a failed save never truncates the
+            # existing output
+            tmp_file = self.current_output_file + ".tmp"
+            with open(tmp_file, 'wb', buffering=1 << 20) as f:
+                f.write(content.encode('utf-8'))
+            os.replace(tmp_file, self.current_output_file)
             self.show_message("Changes saved successfully!")
-            self.update_counts()
         except Exception as e:
             self.show_error(f"An error occurred while saving: {str(e)}")
 
     def show_message(self, message):
-        message_window = ctk.CTkToplevel(self)
-        message_window.title("Message")
-        message_window.attributes('-topmost', True)
-        
-        # Set the desired size
-        width = 500
-        height = 200
-        
-        # Center the window on the screen
-        screen_width = message_window.winfo_screenwidth()
-        screen_height = message_window.winfo_screenheight()
-        x = (screen_width // 2) - (width // 2)
-        y = (screen_height // 2) - (height // 2)
-        message_window.geometry(f"{width}x{height}+{x}+{y}")
-        
-        message_label = ctk.CTkLabel(message_window, text=message, wraplength=460, font=("Arial", 12))
-        message_label.pack(pady=15, padx=15, expand=True)
-        
-        ok_button = ctk.CTkButton(message_window, text="OK", command=message_window.destroy, width=80, height=25, font=("Arial", 11))
-        ok_button.pack(pady=10)
-        
-        # Wait for the window to be created and then update its size
-        message_window.update()
-        message_window.minsize(width, height)
-        message_window.maxsize(width, height)
-        
+        # Reuse a single message window across calls: constructing and
+        # destroying a CTkToplevel per message churns widgets needlessly
+        if self._message_window is None or not self._message_window.winfo_exists():
+            message_window = ctk.CTkToplevel(self)
+            message_window.title("Message")
+            message_window.attributes('-topmost', True)
+
+            # Set the desired size
+            width = 500
+            height = 200
+
+            # Center the window on the screen
+            screen_width = message_window.winfo_screenwidth()
+            screen_height = message_window.winfo_screenheight()
+            x = (screen_width // 2) - (width // 2)
+            y = (screen_height // 2) - (height // 2)
+            message_window.geometry(f"{width}x{height}+{x}+{y}")
+
+            message_label = ctk.CTkLabel(message_window, text=message, wraplength=460, font=MESSAGE_FONT)
+            message_label.pack(pady=15, padx=15, expand=True)
+
+            # Hide instead of destroy, so the window can be shown again
+            ok_button = ctk.CTkButton(message_window, text="OK", command=message_window.withdraw, width=80, height=25, font=MESSAGE_BUTTON_FONT)
+            ok_button.pack(pady=10)
+            message_window.protocol("WM_DELETE_WINDOW", message_window.withdraw)
+
+            # Wait for the window to be created and then update its size
+            message_window.update()
+            message_window.minsize(width, height)
+            message_window.maxsize(width, height)
+
+            self._message_window = message_window
+            self._message_label = message_label
+        else:
+            self._message_label.configure(text=message)
+            self._message_window.deiconify()
+
         # Lift the window to the top
-        message_window.lift()
-        message_window.focus_force()
+        self._message_window.lift()
+        self._message_window.focus_force()
 
     def copy_selected_files(self):
         selected_items = self.sidebar.selection()
@@ -336,29 +585,37 @@ class App(ctk.CTk):
         content = self.text_display.get("1.0", "end-1c")
 
         for item in selected_items:
+            # Fast path: the analysis already indexed each file's span
+            span = self._file_index.get(item)
+            if span is not None:
+                _, start, end = span
+                copied_content.append(content[start:end].strip())
+                continue
+
+            # Fallback for folders and loaded sessions without an index
             parts = item.split('/')
             search_text = parts[-1]
-            
+
             if len(parts) == 1:  # top-level folder
                 search_pattern = f"---{search_text}---"
             elif '.' in search_text:  # file
                 search_pattern = f"--{search_text}--"
             else:  # subfolder
                 search_pattern = f"---{search_text}/---"
-            
+
             start_index = content.find(search_pattern)
             if start_index != -1:
                 content_start = start_index + len(search_pattern)
                 next_file_index = content.find("\n--", content_start)
                 next_folder_index = content.find("\n---", content_start)
-                
+
                 if next_file_index != -1 and (next_folder_index == -1 or next_file_index < next_folder_index):
                     end_index = next_file_index
                 elif next_folder_index != -1:
                     end_index = next_folder_index
                 else:
                     end_index = len(content)
-                
+
                 file_content = content[content_start:end_index].strip()
                 copied_content.append(f"{search_pattern}\n{file_content}")
 
@@ -366,7 +623,7 @@ class App(ctk.CTk):
             full_content = "\n\n".join(copied_content)
             self.clipboard_clear()
             self.clipboard_append(full_content)
-            self.clipboard_get()  # For Linux
+            self.update_idletasks()  # Flush the clipboard to the X selection
             self.show_message(f"Content of {len(selected_items)} file(s) copied to clipboard")
         else:
             self.show_message("No content found for selected files")
@@ -385,26 +642,68 @@ class App(ctk.CTk):
         y = (error_window.winfo_screenheight() // 2) - (height // 2)
         error_window.geometry('{}x{}+{}+{}'.format(width, height, x, y))
         
-        error_label = ctk.CTkLabel(error_window, text=message, wraplength=350, font=("Arial", 14))
+        error_label = ctk.CTkLabel(error_window, text=message, wraplength=350, font=ERROR_FONT)
         error_label.pack(pady=20, padx=20, expand=True)
         
-        ok_button = ctk.CTkButton(error_window, text="OK", command=error_window.destroy, width=100, height=30, font=("Arial", 12))
+        ok_button = ctk.CTkButton(error_window, text="OK", command=error_window.destroy, width=100, height=30, font=ERROR_BUTTON_FONT)
         ok_button.pack(pady=10)
 
     def count_tokens(self, text):
         try:
-            encoding = tiktoken.encoding_for_model("gpt-4")
-            return len(encoding.encode(text))
+            encoding = get_encoding()
+            # Split on the "--file--" headers produced by concatenate_files
+            # and memoize the count per section, so unchanged sections cost
+            # a hash lookup instead of a full encode.
+            sections = text.split("\n--")
+            sections = sections[:1] + ["\n--" + s for s in sections[1:]]
+            keys = [hashlib.blake2b(s.encode("utf-8"), digest_size=16).digest()
+                    for s in sections]
+            fresh_cache = {}
+            missing = {}
+            for key, section in zip(keys, sections):
+                count = self._token_cache.get(key)
+                if count is not None:
+                    fresh_cache[key] = count
+                elif key not in missing:
+                    missing[key] = section
+            if missing:
+                # Batch-encode all cache misses in one call: tiktoken's Rust
+                # core releases the GIL per chunk, and the ordinary variant
+                # skips the special-token regex pass
+                encoded = encoding.encode_ordinary_batch(list(missing.values()))
+                for key, tokens in zip(missing, encoded):
+                    fresh_cache[key] = len(tokens)
+            # Keep only sections present in the current buffer
+            self._token_cache = fresh_cache
+            return sum(fresh_cache[key] for key in keys)
         except Exception as e:
-            logging.error(f"Error counting tokens: {str(e)}")
+            logging.error("Error counting tokens: %s", e)
             return 0
 
     def update_counts(self, event=None):
+        # Debounce: coalesce rapid edits so only the last one in a
+        # 250 ms window triggers a full recount of the buffer.
+        if self._count_job:
+            self.after_cancel(self._count_job)
+        self._count_job = self.after(250, self._do_update_counts)
+
+    def _do_update_counts(self):
+        self._count_job = None
         text = self.text_display.get("1.0", "end-1c")
-        char_count = len(text)
-        token_count = self.count_tokens(text)
-        self.char_count_label.configure(text=f"Characters: {char_count}")
-        self.token_count_label.configure(text=f"Tokens: {token_count}")
+        self.char_count_label.configure(text=f"Characters: {len(text)}")
+        # Encoding a large buffer can stall the UI, so count tokens on the
+        # worker pool; the generation counter drops results that were
+        # superseded by a newer recount before they arrived.
+        self._count_generation += 1
+        generation = self._count_generation
+        future = self._executor.submit(self.count_tokens, text)
+        future.add_done_callback(
+            lambda f: self.after(0, self._apply_token_count, f, generation))
+
+    def _apply_token_count(self, future, generation):
+        if generation != self._count_generation:
+            return
+        self.token_count_label.configure(text=f"Tokens: {future.result()}")
 
     def load_session(self):
         ai_chat_repo_helper_dir = os.path.join(os.getcwd(), "LLM_Chat_Repo_Context")
@@ -415,8 +714,10 @@ class App(ctk.CTk):
             if os.path.exists(analysis_file):
                 with open(analysis_file, 'r', encoding='utf-8') as f:
                     content = f.read()
-                self.text_display.delete("1.0", "end")
-                self.text_display.insert("1.0", content)
+                # A loaded session has no analysis index; drop any stale one
+                self._file_index = {}
+                self._highlighted_line = None
+                self._set_display_text(content)
                 self.current_session_folder = session_folder
                 self.current_output_file = analysis_file
                 self.update_counts()
@@ -446,13 +747,14 @@ class App(ctk.CTk):
         self.current_session_folder = None
         self.current_output_file = None
 
-        # Run analysis
-        try:
-            self.run_analysis(args)
-        except Exception as e:
-            self.show_error(f"An error occurred: {str(e)}")
+        # Run the analysis on a worker thread so the GUI stays responsive;
+        # the done callback marshals the result back onto the Tk main thread
+        self.analyze_button.configure(state="disabled")
+        future = self._executor.submit(self._do_analysis, args)
+        future.add_done_callback(lambda f: self.after(0, self._on_analysis_done, f, args))
 
-    def run_analysis(self, args):
+    def _do_analysis(self, args):
+        """Worker-thread part of the analysis. Must not touch any widgets."""
         # Normalize the input URL
         repo_url = args.input
         if not repo_url.endswith('.git'):
@@ -460,77 +762,131 @@ class App(ctk.CTk):
 
         repo_name = repo_url.split('/')[-1].replace('.git', '')
         session_name = f"{repo_name}_{datetime.now().strftime('%Y_%m_%d_%H%M%S')}"
-        
+
         # Create the session folder inside AI_Chat_Repo_Helper
         ai_chat_repo_helper_dir = os.path.join(os.getcwd(), "AI_Chat_Repo_Helper")
-        self.current_session_folder = os.path.join(ai_chat_repo_helper_dir, session_name)
-        os.makedirs(self.current_session_folder, exist_ok=True)
-        
+        session_folder = os.path.join(ai_chat_repo_helper_dir, session_name)
+        os.makedirs(session_folder, exist_ok=True)
+
         # Name the text file the same as the session folder
-        self.current_output_file = os.path.join(self.current_session_folder, f"{session_name}.txt")
+        output_file = os.path.join(session_folder, f"{session_name}.txt")
 
-        temp_dir = tempfile.mkdtemp()
+        temp_dir = None
         try:
-            logging.info(f"Cloning repository: {repo_url}")
-            porcelain.clone(repo_url, temp_dir)
-            
-            logging.info("Generating folder structure")
-            structure = get_structure(
-                temp_dir, 
-                args.directories, 
-                args.exclude, 
-                args.include, 
-                not args.include_git, 
-                not args.include_license, 
-                args.exclude_readme
+            repo_dir = None
+
+            # Public GitHub repos serve a plain tarball of HEAD, which skips
+            # pack negotiation entirely and avoids leaving a .git behind
+            if _GITHUB_URL.match(repo_url):
+                try:
+                    temp_dir, repo_dir = fetch_github_tarball(repo_url)
+                except Exception as e:
+                    logging.warning("Tarball download failed (%s), falling back to clone", e)
+
+            if repo_dir is None:
+                # Reuse a cached clone of the repository when one exists, so
+                # re-analyzing the same URL skips the network fetch
+                cache_root = os.path.join(ai_chat_repo_helper_dir, ".clone_cache")
+                os.makedirs(cache_root, exist_ok=True)
+                repo_dir = fetch_repo(repo_url, cache_root)
+
+            logging.info("Analyzing repository tree")
+            structure, concat_chunks, file_positions = walk_repo(
+                repo_dir,
+                args.directories,
+                args.exclude,
+                args.include,
+                not args.include_git,
+                not args.include_license,
+                args.exclude_readme,
+                concatenate=args.concatenate
             )
-            
-            content = f"Folder structure:\n{structure}\n"
-            
-            if args.concatenate:
-                logging.info("Concatenating file contents")
-                concat_content, file_positions = concatenate_files(
-                    temp_dir, 
-                    args.exclude, 
-                    args.include, 
-                    not args.include_git, 
-                    not args.include_license, 
-                    args.exclude_readme
-                )
-                content += f"\nConcatenated content:\n{concat_content}"
-            else:
-                file_positions = {}
-            
-            # Clear previous content and sidebar
-            self.text_display.delete("1.0", "end")
-            self.sidebar.pack_forget()
 
-            # Display content in the text widget
-            self.text_display.delete("1.0", "end")
-            self.text_display.insert("1.0", content)
-            self.update_counts()  # Update counts after inserting text
-            
-            # Update sidebar if concatenation was selected
-            if args.concatenate:
-                self.update_sidebar(file_positions)
-            else:
-                self.sidebar.pack_forget()
-                self.text_frame.pack(side="left", fill="both", expand=True)
-            
-            # Save content to file
-            with open(self.current_output_file, 'w', encoding='utf-8') as f:
-                f.write(content)
-            
-            logging.info(f"Output written to {self.current_output_file}")
-            self.show_message(f"Analysis completed. Session saved in:\n{self.current_session_folder}")
-            
+            # Stream the output to disk as it is produced, so the full
+            # concatenation never has to exist in memory twice
+            prefix_length = 0
+            with open(output_file, 'w', encoding='utf-8') as f:
+                prefix = f"Folder structure:\n{structure}\n"
+                if args.concatenate:
+                    prefix += "\nConcatenated content:\n"
+                f.write(prefix)
+                prefix_length = len(prefix)
+                if args.concatenate:
+                    for chunk in concat_chunks:
+                        f.write(chunk)
+
+            # Read back the finished file for display
+            with open(output_file, 'r', encoding='utf-8') as f:
+                content = f.read()
+
+            # Shift stream-relative offsets to document offsets and index
+            # each file section once, so the UI never rescans the text
+            file_positions = {path: pos + prefix_length for path, pos in file_positions.items()}
+            file_index = build_file_index(content, file_positions)
+
+            # Tokenize here on the worker: the first count over a fresh
+            # document is the expensive one, and it also warms the
+            # per-section cache for later recounts
+            token_count = self.count_tokens(content)
+
+            logging.info("Output written to %s", output_file)
+            return content, file_positions, file_index, token_count, session_folder, output_file
+
         except Exception as e:
-            logging.error(f"An error occurred: {str(e)}")
+            logging.error("An error occurred: %s", e)
             raise
         finally:
-            logging.info("Cleaning up temporary directory")
-            time.sleep(1)
-            safe_remove(temp_dir)
+            if temp_dir is not None:
+                safe_remove(temp_dir)
+
+    def _on_analysis_done(self, future, args):
+        """Main-thread continuation: display the finished analysis."""
+        self.analyze_button.configure(state="normal")
+        try:
+            content, file_positions, file_index, token_count, session_folder, output_file = future.result()
+        except Exception as e:
+            self.show_error(f"An error occurred: {str(e)}")
+            return
+
+        self.current_session_folder = session_folder
+        self.current_output_file = output_file
+        self._file_index = file_index
+
+        # Clear previous content and sidebar
+        self.sidebar.pack_forget()
+        self._set_display_text(content)
+
+        # Counts were computed on the worker; set the labels directly
+        self.char_count_label.configure(text=f"Characters: {len(content)}")
+        self.token_count_label.configure(text=f"Tokens: {token_count}")
+
+        # Update sidebar if concatenation was selected
+        if args.concatenate:
+            self.update_sidebar(file_positions)
+        else:
+            self.sidebar.pack_forget()
+            self.text_frame.pack(side="left", fill="both", expand=True)
+
+        self.show_message(f"Analysis completed. Session saved in:\n{self.current_session_folder}")
+
+    def _set_display_text(self, content):
+        """Replace the display content, inserting in chunks so Tk lays out
+        large documents incrementally instead of freezing on one call."""
+        self.text_display.delete("1.0", "end")
+        lines = content.split('\n')
+        chunk_size = 10000
+        # Rate-limit the refreshes: yielding to the event loop after every
+        # chunk queues more redraws than the display can usefully show
+        last_refresh = time.monotonic()
+        for i in range(0, len(lines), chunk_size):
+            chunk = '\n'.join(lines[i:i + chunk_size])
+            if i:
+                chunk = '\n' + chunk
+            self.text_display.insert("end", chunk)
+            now = time.monotonic()
+            if now - last_refresh > 0.1:
+                self.update_idletasks()
+                last_refresh = now
 
     def update_sidebar(self, file_positions):
         if not file_positions:
@@ -541,20 +897,28 @@ class App(ctk.CTk):
         self.sidebar_frame.pack(side="left", fill="y", padx=(10, 0), pady=10)
         self.text_frame.pack(side="right", fill="both", expand=True, padx=(10, 0), pady=10)
 
+        # Detach the selection handler during the bulk rebuild so clearing
+        # and repopulating doesn't fire scroll_to_file per change
+        self.sidebar.unbind("<<TreeviewSelect>>")
         self.sidebar.delete(*self.sidebar.get_children())
-        
+
         # Make sure the sidebar is visible and fills the frame
         self.sidebar.pack(side="top", fill="both", expand=True)
 
-        for path, position in file_positions.items():
-            parts = path.split(os.sep)
+        # Track inserted ids locally: sidebar.exists crosses the Tcl/Tk
+        # boundary per call, which adds up on repos with thousands of files
+        inserted = set()
+        for path, position in sorted(file_positions.items(), key=lambda kv: kv[1]):
             current_path = ""
-            for i, part in enumerate(parts):
-                current_path += part if i == 0 else f"/{part}"
-                parent_path = "/".join(parts[:i]) if i > 0 else ""
-                
-                if not self.sidebar.exists(current_path):
+            for part in path.split('/'):
+                # Thread the parent id along instead of re-joining the
+                # path prefix for every segment
+                parent_path = current_path
+                current_path = part if not current_path else f"{current_path}/{part}"
+
+                if current_path not in inserted:
                     self.sidebar.insert(parent_path, "end", current_path, text=part, open=True)
+                    inserted.add(current_path)
 
         self.sidebar.bind("<<TreeviewSelect>>", self.scroll_to_file)
 
@@ -565,38 +929,58 @@ class App(ctk.CTk):
 
     def scroll_to_file(self, event):
         selected_item = self.sidebar.selection()[0]
+
+        # Fast path: the index already knows the header's line number
+        span = self._file_index.get(selected_item)
+        if span is not None:
+            line_number = span[0]
+            self._highlight_line(line_number)
+            return
+
+        # Fallback for folders and loaded sessions without an index
         parts = selected_item.split('/')
         search_text = parts[-1]  # Get the last part of the path
-        
+
         if len(parts) == 1:  # It's a top-level folder
             search_pattern = f"---{search_text}---"
         elif '.' in search_text:  # It's a file
             search_pattern = f"--{search_text}--"
         else:  # It's a subfolder
             search_pattern = f"---{search_text}/---"
-        
+
         content = self.text_display.get("1.0", "end-1c")
         start_index = content.find(search_pattern)
-        
+
         if start_index != -1:
             line_number = content.count('\n', 0, start_index) + 1
-            self.text_display.see(f"{line_number}.0")
-            self.text_display.tag_remove("highlight", "1.0", "end")
-            self.text_display.tag_add("highlight", f"{line_number}.0", f"{line_number}.0 lineend")
-            self.text_display.tag_config("highlight", background="#8E44AD", foreground="white")
-            
-            # Ensure the highlighted line is visible
-            self.text_display.after(100, lambda: self.text_display.see(f"{line_number}.0"))
+            self._highlight_line(line_number)
+
+    def _highlight_line(self, line_number):
+        self.text_display.see(f"{line_number}.0")
+        # Remove the tag from the previously highlighted line only, rather
+        # than sweeping it off the entire document
+        if self._highlighted_line is not None:
+            self.text_display.tag_remove(
+                "highlight",
+                f"{self._highlighted_line}.0",
+                f"{self._highlighted_line}.0 lineend"
+            )
+        self.text_display.tag_add("highlight", f"{line_number}.0", f"{line_number}.0 lineend")
+        self._highlighted_line = line_number
+
+        # Ensure the highlighted line is visible
+        self.text_display.after(100, lambda: self.text_display.see(f"{line_number}.0"))
 
     def copy_text(self):
         selected_text = self.text_display.selection_get() if self.text_display.tag_ranges("sel") else self.text_display.get("1.0", "end-1c")
         self.clipboard_clear()
         self.clipboard_append(selected_text)
-        self.clipboard_get()  # For Linux, this is needed to push to system clipboard
+        self.update_idletasks()  # Flush the clipboard to the X selection
 
 def main_gui():
     app = App()
     app.mainloop()
 
 if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
     main_gui()